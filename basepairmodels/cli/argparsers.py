@@ -1,9 +1,352 @@
 import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
 
+from functools import lru_cache
+
+# the parser factories below are memoized so that each fully populated
+# parser is built only once per process; callers should treat the
+# returned parsers as read-only
+
+# choices & defaults are immutable module level constants, so that a
+# single copy is shared by all parsers (and all parses of the memoized
+# parsers)
+_CHOICES_SAMPLING_MODE = ('peaks', 'sequential', 'random')
+
+
+class _SmoothingAction(argparse.Action):
+    """ argparse action to parse a list of sigma & window width pairs
+        for gaussian 1D smoothing of the control
+
+        The parsed value is a list of (sigma (float), window_width
+        (int)) tuples, e.g. `--control-smoothing 7.0 81` gives
+        [(7.0, 81)]. The defaults have the same shape, so downstream
+        code can use the values as is without any conversion.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        if len(values) % 2 != 0:
+            raise argparse.ArgumentError(
+                self, "expected pairs of sigma and window width values")
+
+        try:
+            smoothing = [(float(sigma), int(window_width))
+                         for sigma, window_width in
+                         zip(values[::2], values[1::2])]
+        except ValueError:
+            raise argparse.ArgumentError(
+                self, "invalid sigma and window width values: {}".format(
+                    ' '.join(values)))
+
+        setattr(namespace, self.dest, smoothing)
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """ ArgumentParser that converts the int & float arguments in a
+        single pass after parsing, instead of invoking the `type`
+        callable for each argument while parsing
+
+        Arguments are declared as usual (e.g. `type=int`); the type is
+        recorded and removed from the action when the argument is
+        added, including arguments inherited from `parents`. The
+        required, nargs & choices checks are still done by argparse.
+    """
+
+    # argument types that are converted after parsing
+    COERCE_TYPES = (int, float)
+
+    def __init__(self, *args, **kwargs):
+        # map of dest to (type, action) for the arguments that need
+        # to be converted
+        self._coerce_types = {}
+
+        super().__init__(*args, **kwargs)
+
+        # the actions inherited from the parents are not added through
+        # _add_action
+        for parent in kwargs.get('parents', []):
+            self._coerce_types.update(getattr(parent, '_coerce_types', {}))
+
+    def _add_action(self, action):
+        if action.type in self.COERCE_TYPES:
+            self._coerce_types[action.dest] = (action.type, action)
+            action.type = None
+
+        return super()._add_action(action)
+
+    def _coerce(self, namespace):
+        """ Convert the string values in the namespace to the
+            declared int/float types
+
+            Args:
+                namespace (argparse.Namespace): the parsed arguments
+
+            Raises:
+                argparse.ArgumentError: if a value can't be converted
+        """
+
+        values = vars(namespace)
+        for dest, (dest_type, action) in self._coerce_types.items():
+            value = values.get(dest)
+
+            # defaults are already of the right type, only strings from
+            # the command line need to be converted
+            try:
+                if isinstance(value, str):
+                    values[dest] = dest_type(value)
+                elif isinstance(value, list):
+                    for idx, item in enumerate(value):
+                        if isinstance(item, str):
+                            value = item
+                            values[dest][idx] = dest_type(item)
+            except ValueError:
+                raise argparse.ArgumentError(
+                    action, "invalid {} value: {!r}".format(
+                        dest_type.__name__, value))
+
+    def parse_known_args(self, args=None, namespace=None):
+        namespace, extras = super().parse_known_args(args, namespace)
+
+        try:
+            self._coerce(namespace)
+        except argparse.ArgumentError as err:
+            self.error(str(err))
+
+        return namespace, extras
+
+@lru_cache(maxsize=1)
+def _make_reference_parser():
+    """ Reference genome argument shared by the CLI scripts
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--reference-genome', '-g', type=str, required=True,
+                        help="the path to the reference genome fasta file")
+    return parser
+
+
+@lru_cache(maxsize=1)
+def _make_chrom_sizes_parser():
+    """ Chromosome sizes argument shared by the CLI scripts
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--chrom-sizes', '-s', type=str, required=True,
+                        help="path to chromosome sizes file")
+    return parser
+
+
+@lru_cache(maxsize=None)
+def _make_io_parser(stranded_help="specify if the input data is stranded or "
+                    "unstranded"):
+    """ Input data arguments shared by the train & predict scripts
+
+        Args:
+            stranded_help (str): help text for --stranded
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--input-data', '-i', type=str, required=True,
+                        help="path to json file containing task information")
+
+    parser.add_argument('--stranded', action='store_true',
+                        help=stranded_help)
+
+    parser.add_argument('--has-control', action='store_true',
+                        help="specify if the input data has controls")
+    return parser
+
+
+@lru_cache(maxsize=1)
+def _make_batchgen_parser():
+    """ Batch generation arguments shared by the train & predict
+        scripts
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--input-seq-len', type=int,
+                        help="length of input DNA sequence", default=3088)
+
+    parser.add_argument('--output-len', type=int,
+                        help="length of output profile", default=1000)
+
+    parser.add_argument('--sequence-generator-name', type=str,
+                        help="the name of the sequence generator from "
+                        "mseqgen library that will be used to generate "
+                        "batches of data ", default='BPNet')
+    return parser
+
+
+@lru_cache(maxsize=None)
+def _make_timestamp_parser(output_name, directory_name):
+    """ Timestamped output directory arguments shared by the predict
+        & metrics scripts
+
+        Args:
+            output_name (str): name of the output in the help text of
+                --automate-filenames, e.g. 'predictions'
+            
+            directory_name (str): name of the directories in the help
+                text of --time-zone, e.g. 'model'
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--automate-filenames', action='store_true',
+                        help="specify if the {} output should be stored in a "
+                        "timestamped subdirectory within "
+                        "--output-dir".format(output_name))
+
+    parser.add_argument('--time-zone', type=str,
+                        help="time zone to use for timestamping {} "
+                        "directories".format(directory_name),
+                        default='US/Pacific')
+    return parser
+
+
+@lru_cache(maxsize=1)
+def _make_shap_common_parser():
+    """ Arguments shared by the interpret & shap_scores scripts
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--reference-genome', '-g', type=str, required=True,
+                        help="path to the reference genome file")
+
+    # input params
+    parser.add_argument('--input-seq-len', type=int, required=True,
+                        help="the length of the input sequence to the model")
+
+    parser.add_argument('--control-len', type=int, required=True,
+                        help="the length of the control input to the model")
+
+    parser.add_argument('--model', '-m', type=str, required=True,
+                        help="the path to the model (.h5) file")
+
+    parser.add_argument('--task-id', '-t', type=int,
+                        help="In the multitask case the integer sequence "
+                        "number of the task for which the interpretation "
+                        "scores should be computed. For single task use 0.",
+                        default=0)
+
+    parser.add_argument('--bed-file', '-b', type=str, required=True,
+                        help="the path to the bed file containing "
+                        "postions at which the model should be interpreted")
+
+    parser.add_argument('--sample', '-s', type=int,
+                        help="the number of samples to randomly sample from "
+                        "the bed file. Only one of --sample or --chroms can "
+                        "be used.")
+
+    parser.add_argument('--chroms', '-c', nargs='+',
+                        help="list of chroms on which the contribution scores "
+                        "are to be computed. If not specified all chroms in "
+                        "--bed-file will be processed.")
+
+    parser.add_argument('--presort-bed-file', action='store_true',
+                        help="specify if the --bed-file should be sorted in "
+                        "descending order of enrichment. It is assumed that "
+                        "the --bed-file has 'signalValue' in column 7 to use "
+                        "for sorting.")
+
+    parser.add_argument('--control-info', type=str,
+                        help="path to the input json file that has paths to "
+                        "control bigWigs. The --task-id is matched with "
+                        "'task_id' in the the json file to get the list of "
+                        "control bigWigs")
+
+    parser.add_argument('--control-smoothing', nargs='+',
+                        action=_SmoothingAction,
+                        help="sigma and window width for gaussian 1d "
+                        "smoothing of the control", default=((7.0, 81),))
+
+    parser.add_argument('--num-shuffles', type=int,
+                        help="the number of dinucleotide shuffles to perform "
+                        "on each input sequence", default=20)
+
+    parser.add_argument('--gen-null-dist', action='store_true',
+                        help="generate null distribution of shap scores by "
+                        "using a dinucleotide shuffled input sequence")
+
+    # output params
+    parser.add_argument('--output-directory', '-o', type=str, required=True,
+                        help="destination directory to store the "
+                        "interpretation scores")
+
+    parser.add_argument('--automate-filenames', action='store_true',
+                        help="specify if the interpret output should be stored"
+                        "in a timestamped subdirectory within --output-dir")
+
+    parser.add_argument('--time-zone', type=str,
+                        help="time zone to use for timestamping output "
+                        "directories", default='US/Pacific')
+    return parser
+
+
+@lru_cache(maxsize=1)
+def _make_shap_scores_parser():
+    """ Performance arguments specific to the shap_scores script
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    parser = _ArgumentParser(add_help=False)
+
+    parser.add_argument('--threads', type=int,
+                        help="number of parallel threads for fetching the "
+                        "reference sequences & control values", default=8)
+
+    parser.add_argument('--freeze-model', action='store_true',
+                        help="convert the model variables to constants "
+                        "before computing the shap scores")
+
+    parser.add_argument('--xla', action='store_true',
+                        help="use XLA JIT compilation for the model graph")
+
+    parser.add_argument('--mixed-precision', action='store_true',
+                        help="run the model in float16, keeping the "
+                        "variables & the model outputs in float32")
+
+    parser.add_argument('--shap-batch-size', type=int,
+                        help="number of peaks passed to the shap "
+                        "explainers at a time", default=256)
+    return parser
+
+
+@lru_cache(maxsize=1)
 def training_argsparser():
     # command line arguments
-    parser = argparse.ArgumentParser()
-    
+    parser = _ArgumentParser(
+        parents=[_make_reference_parser(), _make_io_parser(),
+                 _make_batchgen_parser()])
+
     # training params
     parser.add_argument('--batch-size', '-b', type=int, 
                         help="training batch size", default=64)
@@ -44,11 +387,6 @@ def training_argsparser():
                         "to fetch the model from model_archs)",
                         default='BPNet')
 
-    parser.add_argument('--sequence-generator-name', type=str,
-                        help="the name of the sequence generator from "
-                        "mseqgen library that will be used to generate "
-                        "batches of data ", default='BPNet')
-
     parser.add_argument('--filters', '-f', type=int,
                         help="number of filters to use in BPNet",
                         default=64)
@@ -57,7 +395,11 @@ def training_argsparser():
                         help="Weight for counts mse loss",
                         default=100.0)
     
-    parser.add_argument('--control-smoothing', default=[[7.5, 80]])
+    parser.add_argument('--control-smoothing', nargs='+',
+                        action=_SmoothingAction,
+                        help="list of sigma and window width pairs for "
+                        "gaussian 1d smoothing of the control",
+                        default=((7.5, 80),))
     
     # parallelization params
     parser.add_argument('--threads', '-t', type=int,
@@ -68,9 +410,6 @@ def training_argsparser():
                         help="number of gpus to use", default=1)
     
     # reference params
-    parser.add_argument('--reference-genome', '-g', type=str, required=True,
-                        help="number of gpus to use", default=1)
-    
     parser.add_argument('--chrom-sizes', '-c', type=str, required=True,
                         help="path to chromosome sizes file")
     
@@ -78,7 +417,7 @@ def training_argsparser():
                         help="master list of chromosomes for the genome")
     
     parser.add_argument('--exclude-chroms', nargs='+', help="list of "
-                        "chromosomes to be excluded", default=[])    
+                        "chromosomes to be excluded", default=())    
 
     # validation params
     parser.add_argument('--splits', '-s', type=str,
@@ -109,12 +448,6 @@ def training_argsparser():
                         "not used)", default="")
 
     # batch gen parameters
-    parser.add_argument('--input-seq-len', type=int, 
-                        help="length of input DNA sequence", default=3088)
-
-    parser.add_argument('--output-len', type=int, 
-                        help="length of output profile", default=1000)
-
     parser.add_argument('--max-jitter', type=int, 
                         help="maximum value for randomized jitter to offset "
                         "the peaks from the exact center of the input",
@@ -127,22 +460,9 @@ def training_argsparser():
     parser.add_argument('--negative-sampling-rate', type=float,
                         help="number of negatives to sample for every "
                         "positive peak", default=0.0)
-        
-    # input data params
-    parser.add_argument('--input-data', '-i', type=str,
-                        help="path to json file containing task information", 
-                        required=True)
-    
-    parser.add_argument('--stranded', action='store_true', 
-                        help="specify if the input data is stranded or "
-                        "unstranded")
-
-    parser.add_argument('--has-control', action='store_true', 
-                        help="specify if the input data has controls")
 
-    
     parser.add_argument('--sampling-mode', type=str, 
-                        choices=['peaks', 'sequential', 'random'], 
+                        choices=_CHOICES_SAMPLING_MODE,
                         default='peaks')
     
     parser.add_argument('--shuffle', action='store_true')
@@ -171,66 +491,172 @@ def training_argsparser():
 
     parser.add_argument('--attribution-prior-counts-grad-loss-weight', 
                         type=float,  help="weight for the attribution "
-                        "prior loss computed on counts gradients", 
+                        "prior loss computed on counts gradients",
                         default=100.0)
 
     return parser
 
 
+@lru_cache(maxsize=None)
+def _parse_training_args(argv):
+    return training_argsparser().parse_args(list(argv))
+
+
+def get_training_args(argv=None):
+    """ Parsed command line arguments for the training script
+
+        The parsed result is cached per unique argument list, so
+        repeated calls with the same arguments do not re-run the
+        parser.
+
+        Args:
+            argv (list): list of command line arguments, excluding
+                the program name. If None, sys.argv[1:] is used
+
+        Returns:
+            argparse.Namespace
+    """
+
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # return a deep copy so the cached namespace (including its list
+    # values) can't be modified by the caller
+    return copy.deepcopy(_parse_training_args(tuple(argv)))
+
+
+@lru_cache(maxsize=None)
+def _args_class(parser_factory):
+    """ Frozen dataclass with __slots__, built once per parser factory,
+        that has one field per argument of the parser
+
+        Args:
+            parser_factory (function): one of the *_argsparser
+                functions in this module
+
+        Returns:
+            type: e.g. `TrainingArgs` for `training_argsparser`
+    """
+
+    # dataclasses (and the namespace argument of make_dataclass) need
+    # python >= 3.7, imported here so that the module & all the other
+    # parsers still work on python 3.6
+    import dataclasses
+
+    parser = parser_factory()
+
+    fields = []
+    for action in parser._actions:
+        # -h/--help
+        if action.dest is argparse.SUPPRESS or \
+                action.default is argparse.SUPPRESS:
+            continue
+
+        # the annotations are informational only
+        if action.nargs == 0:
+            field_type = bool
+        elif action.nargs is not None:
+            field_type = list
+        elif action.dest in parser._coerce_types:
+            field_type = parser._coerce_types[action.dest][0]
+        elif isinstance(action.type, type):
+            field_type = action.type
+        else:
+            field_type = object
+
+        fields.append((action.dest, field_type))
+
+    for dest in parser._defaults:
+        if dest not in dict(fields):
+            fields.append((dest, object))
+
+    name = parser_factory.__name__[:-len('_argsparser')]
+    class_name = ''.join(
+        word.capitalize() for word in name.split('_')) + 'Args'
+
+    # __slots__ is set explicitly (instead of slots=True) to support
+    # python versions < 3.10
+    return dataclasses.make_dataclass(
+        class_name, fields, frozen=True,
+        namespace={'__slots__': tuple(dest for dest, _ in fields)})
+
+
+def parse_slotted_args(parser_factory, argv=None):
+    """ Parse command line arguments into a frozen, slotted dataclass
+        instance instead of an argparse.Namespace
+
+        Attribute access is faster and instances are smaller than a
+        Namespace, which helps code that reads the arguments in hot
+        loops. Use `dataclasses.asdict` in place of `vars` to get a
+        dictionary of the arguments. Requires python >= 3.7.
+
+        Args:
+            parser_factory (function): one of the *_argsparser
+                functions in this module
+
+            argv (list): list of command line arguments, excluding
+                the program name. If None, sys.argv[1:] is used
+
+        Returns:
+            dataclass instance, e.g. `TrainingArgs`
+    """
+
+    args = parser_factory().parse_args(argv)
+
+    return _args_class(parser_factory)(**vars(args))
+
+
+def parse_training_args(argv=None):
+    """ Parsed command line arguments for the training script as a
+        frozen, slotted `TrainingArgs` instance
+
+        Args:
+            argv (list): list of command line arguments, excluding
+                the program name. If None, sys.argv[1:] is used
+
+        Returns:
+            TrainingArgs
+    """
+
+    return parse_slotted_args(training_argsparser, argv)
+
+
+@lru_cache(maxsize=1)
 def predict_argsparser():
     """ Command line arguments for the predict script
 
         Returns:
             argparse.ArgumentParser
     """
-    
-    parser = argparse.ArgumentParser()
-    
+
+    parser = _ArgumentParser(
+        parents=[_make_reference_parser(), _make_chrom_sizes_parser(),
+                 _make_io_parser(
+                     stranded_help="specify if the input data is stranded "
+                     "or unstranded (i.e in case --has-control is True)"),
+                 _make_batchgen_parser(),
+                 _make_timestamp_parser('predictions', 'model')])
+
     # batch gen parameters
     parser.add_argument('--batch-size', '-b', type=int, help="test batch size",
                         default=64)
-        
-    parser.add_argument('--input-seq-len', type=int, 
-                        help="length of input DNA sequence", default=3088)
-
-    parser.add_argument('--output-len', type=int, 
-                        help="length of output profile", default=1000)
-    
-    parser.add_argument('--sequence-generator-name', type=str,
-                        help="the name of the sequence generator from "
-                        "mseqgen library that will be used to generate "
-                        "batches of data ", default='BPNet')
 
     # network params     
-    parser.add_argument('--control-smoothing', default=[[7.5, 80]])
+    parser.add_argument('--control-smoothing', nargs='+',
+                        action=_SmoothingAction,
+                        help="list of sigma and window width pairs for "
+                        "gaussian 1d smoothing of the control",
+                        default=((7.5, 80),))
     
     # predict modes
     parser.add_argument('--predict-peaks', action='store_true', 
                         help="generate predictions only on the peaks "
                         "contained in the peaks.bed files")
 
-    # reference params
-    parser.add_argument('--reference-genome', '-g', type=str, required=True,
-                        help="the path to the reference genome fasta file")
-    
-    parser.add_argument('--chrom-sizes', '-s', type=str, required=True,
-                        help="path to chromosome sizes file")
-    
     # input data params
     parser.add_argument('--chroms', '-c', nargs='+', required=True,
                         help="list of test chromosomes for prediction")
-        
-    parser.add_argument('--input-data', '-i', type=str,
-                        help="path to json file containing task information", 
-                        required=True)
-    
-    parser.add_argument('--stranded', action='store_true', 
-                        help="specify if the input data is stranded or "
-                        "unstranded (i.e in case --has-control is True)")
 
-    parser.add_argument('--has-control', action='store_true', 
-                        help="specify if the input data has controls")
-    
     parser.add_argument('--model', '-m', type=str, 
                         help="path to the .h5 model file")
 
@@ -246,15 +672,6 @@ def predict_argsparser():
                         help="destination directory to store predictions as a "
                         "bigWig file")
 
-    parser.add_argument('--automate-filenames', action='store_true', 
-                        help="specify if the predictions output should "
-                        "be stored in a timestamped subdirectory within "
-                        "--output-dir")
-    
-    parser.add_argument('--time-zone', type=str,
-                        help="time zone to use for timestamping model "
-                        "directories", default='US/Pacific')
-    
     parser.add_argument('--exponentiate-counts', action='store_true', 
                         help="specify if the predicted counts should be "
                         "exponentiated before writing to the bigWig files")
@@ -266,7 +683,7 @@ def predict_argsparser():
 
     parser.add_argument('--other-tags', nargs='+',
                         help="list of additional tags to be added as "
-                        "suffix to the filenames", default=[])
+                        "suffix to the filenames", default=())
 
     # misc params
     parser.add_argument('--write-buffer-size', type=int,
@@ -274,15 +691,19 @@ def predict_argsparser():
                         "before writing to bigWig files", default=10000)
     return parser
 
+@lru_cache(maxsize=1)
 def fastpredict_argsparser():
     """ Command line arguments for the predict script
 
         Returns:
             argparse.ArgumentParser
     """
-    
-    parser = argparse.ArgumentParser()
-    
+
+    parser = _ArgumentParser(
+        parents=[_make_reference_parser(), _make_chrom_sizes_parser(),
+                 _make_io_parser(),
+                 _make_timestamp_parser('predictions', 'model')])
+
     # batch gen parameters
     parser.add_argument('--batch-size', type=int, 
                         help="predict batch size", default=64)
@@ -304,38 +725,22 @@ def fastpredict_argsparser():
                         "If not specified tiled genome wide predictions "
                         "are generated.")
 
-    # reference params
-    parser.add_argument('--reference-genome', type=str, required=True,
-                        help="the path to the reference genome fasta file")
-    
-    parser.add_argument('--chrom-sizes', '-s', type=str, required=True,
-                        help="path to chromosome sizes file")
-    
     # input data params
     parser.add_argument('--chroms', nargs='+', required=True,
                         help="list of chromosomes for prediction")
-        
-    parser.add_argument('--input-data', type=str, required=True,
-                        help="path to json file containing task information")
-    
+
     parser.add_argument('--model', type=str, required=True,
                         help="path to the .h5 model file")
     
     parser.add_argument('--sequence_generator_name', type=str, required=True,
                         help="the name of the sequence generator in mseqgen "
                         "to use for batch generation")
-    
-    parser.add_argument('--stranded', action='store_true', 
-                        help="specify if the input data is stranded or "
-                        "unstranded")
 
-    parser.add_argument('--has-control', action='store_true', 
-                        help="specify if the input data has controls")
-    
     # network params
     parser.add_argument('--control-smoothing', nargs='+',
+                        action=_SmoothingAction,
                         help="sigma and window size for gaussian 1D smoothing "
-                        "of second control track", default=[7.0, 81])
+                        "of second control track", default=((7.0, 81),))
 
     # output params
     parser.add_argument('--output-window-size', type=int, required=True,
@@ -346,15 +751,6 @@ def fastpredict_argsparser():
     parser.add_argument('--output-dir', type=str, required=True,
                         help="destination directory to store predictions ")
 
-    parser.add_argument('--time-zone', type=str,
-                        help="time zone to use for timestamping model "
-                        "directories", default='US/Pacific')
-
-    parser.add_argument('--automate-filenames', action='store_true', 
-                        help="specify if the predictions output should "
-                        "be stored in a timestamped subdirectory within "
-                        "--output-dir")
-    
     parser.add_argument('--generate-predicted-profile-bigWigs', 
                         action='store_true', 
                         help="generate bigWig files for predicted profile"
@@ -363,15 +759,18 @@ def fastpredict_argsparser():
     return parser
 
 
+@lru_cache(maxsize=1)
 def metrics_argsparser():
     """ Command line arguments for the metrics script
 
         Returns:
             argparse.ArgumentParser
     """
-    
-    parser = argparse.ArgumentParser()
-    
+
+    parser = _ArgumentParser(
+        parents=[_make_chrom_sizes_parser(),
+                 _make_timestamp_parser('metrics', 'output')])
+
     # input params
     parser.add_argument('--profileA', '-A', type=str, required=True,
                         help="the bigWig with ground truth values or a "
@@ -385,13 +784,13 @@ def metrics_argsparser():
                         help="a list of two items, sigma and window width "
                         "for gaussian smoothing of profileA "
                         "before computing metrics. Empty list indicates no"
-                        "smoothing", default=[])
+                        "smoothing", default=())
 
     parser.add_argument('--smooth-profileB', nargs='+',
                         help="a list of two items, sigma and window width "
                         "for gaussian smoothing of profileB "
                         "before computing metrics. Empty list indicates no"
-                        "smoothing", default=[])
+                        "smoothing", default=())
     
     parser.add_argument('--countsA', type=str,
                         help="the bigWig with region counts assigned to "
@@ -437,197 +836,74 @@ def metrics_argsparser():
     # output params
     parser.add_argument('--output-dir', '-o', type=str, required=True,
                         help="destination directory to store metrics results")
-    
-    parser.add_argument('--automate-filenames', action='store_true', 
-                        help="specify if the metrics output should "
-                        "be stored in a timestamped subdirectory within "
-                        "--output-dir")
 
-    parser.add_argument('--time-zone', type=str,
-                        help="time zone to use for timestamping output "
-                        "directories", default='US/Pacific')
-    
     parser.add_argument('--other-tags', nargs='+',
                         help="list of additional tags to be added as "
-                        "suffix to the filenames", default=[])
-
-    # reference params
-    parser.add_argument('--chrom-sizes', '-s', type=str, required=True,
-                        help="path to chromosome sizes file")
+                        "suffix to the filenames", default=())
     return parser
 
-def interpret_argsparser():
-    """ Command line arguments for the interpret script
+def _interpret_like_parser(seed_default, parents=()):
+    """ Command line arguments for the interpret & shap scripts, which
+        only differ in the default value of --seed & the script
+        specific parent parsers
 
-        Returns:
-            argparse.ArgumentParser
-    """
-    
-    parser = argparse.ArgumentParser()
-    
-    #reference params
-    parser.add_argument('--reference-genome', '-g', type=str, required=True,
-                        help="path to the reference genome file")
+        Not memoized, a new parser is returned on every call. The
+        public factories that call it are memoized.
 
-    # input params
-    parser.add_argument('--input-seq-len', type=int, required=True,
-                        help="the length of the input sequence to the model")
-    
-    parser.add_argument('--control-len', type=int, required=True,
-                        help="the length of the control input to the model")
+        Args:
+            seed_default (int): default value for --seed
 
-    parser.add_argument('--model', '-m', type=str, required=True,
-                        help="the path to the model (.h5) file")
+            parents (tuple): additional parent parsers
 
-    parser.add_argument('--task-id', '-t', type=int,
-                        help="In the multitask case the integer sequence "
-                        "number of the task for which the interpretation "
-                        "scores should be computed. For single task use 0.",
-                        default=0)
-    
-    parser.add_argument('--bed-file', '-b', type=str, required=True,
-                        help="the path to the bed file containing "
-                        "postions at which the model should be interpreted")
-
-    parser.add_argument('--sample', '-s', type=int,
-                        help="the number of samples to randomly sample from "
-                        "the bed file. Only one of --sample or --chroms can "
-                        "be used.")
-
-    parser.add_argument('--chroms', '-c', nargs='+',
-                        help="list of chroms on which the contribution scores "
-                        "are to be computed. If not specified all chroms in "
-                        "--bed-file will be processed.")
-
-    parser.add_argument('--presort-bed-file', action='store_true', 
-                        help="specify if the --bed-file should be sorted in "
-                        "descending order of enrichment. It is assumed that "
-                        "the --bed-file has 'signalValue' in column 7 to use "
-                        "for sorting.")
-    
-    parser.add_argument('--control-info', type=str,
-                        help="path to the input json file that has paths to "
-                        "control bigWigs. The --task-id is matched with "
-                        "'task_id' in the the json file to get the list of "
-                        "control bigWigs")
+        Returns:
+            argparse.ArgumentParser
+    """
 
-    parser.add_argument('--control-smoothing', nargs='+',
-                        help="sigma and window width for gaussian 1d "
-                        "smoothing of the control", default=[7.0, 81])
-    
-    parser.add_argument('--num-shuffles', type=int,
-                        help="the number of dinucleotide shuffles to perform "
-                        "on each input sequence", default=20)   
-    
-    parser.add_argument('--gen-null-dist', action='store_true', 
-                        help="generate null distribution of shap scores by "
-                        "using a dinucleotide shuffled input sequence") 
+    parser = _ArgumentParser(
+        parents=[_make_shap_common_parser()] + list(parents))
 
     parser.add_argument('--seed', type=int,
                         help="seed to create a NumPy RandomState object used"
-                        "for performing shuffles", default=20201208)  
-    
-    # output params
-    parser.add_argument('--output-directory', '-o', type=str, required=True,
-                        help="destination directory to store the "
-                        "interpretation scores")
-    
-    parser.add_argument('--automate-filenames', action='store_true', 
-                        help="specify if the interpret output should be stored"
-                        "in a timestamped subdirectory within --output-dir")
-
-    parser.add_argument('--time-zone', type=str,
-                        help="time zone to use for timestamping output "
-                        "directories", default='US/Pacific')
+                        "for performing shuffles", default=seed_default)
     return parser
 
 
-def shap_scores_argsparser():
-    """ Command line arguments for the shap script
+@lru_cache(maxsize=1)
+def interpret_argsparser():
+    """ Command line arguments for the interpret script
 
         Returns:
             argparse.ArgumentParser
     """
-    
-    parser = argparse.ArgumentParser()
-    
-    #reference params
-    parser.add_argument('--reference-genome', '-g', type=str, required=True,
-                        help="path to the reference genome file")
 
-    # input params
-    parser.add_argument('--input-seq-len', type=int, required=True,
-                        help="the length of the input sequence to the model")
-    
-    parser.add_argument('--control-len', type=int, required=True,
-                        help="the length of the control input to the model")
+    return _interpret_like_parser(20201208)
 
-    parser.add_argument('--model', '-m', type=str, required=True,
-                        help="the path to the model (.h5) file")
 
-    parser.add_argument('--task-id', '-t', type=int,
-                        help="In the multitask case the integer sequence "
-                        "number of the task for which the interpretation "
-                        "scores should be computed. For single task use 0.",
-                        default=0)
-    
-    parser.add_argument('--bed-file', '-b', type=str, required=True,
-                        help="the path to the bed file containing "
-                        "postions at which the model should be interpreted")
+@lru_cache(maxsize=1)
+def shap_scores_argsparser():
+    """ Command line arguments for the shap script
 
-    parser.add_argument('--sample', '-s', type=int,
-                        help="the number of samples to randomly sample from "
-                        "the bed file. Only one of --sample or --chroms can "
-                        "be used.")
+        Returns:
+            argparse.ArgumentParser
+    """
 
-    parser.add_argument('--chroms', '-c', nargs='+',
-                        help="list of chroms on which the contribution scores "
-                        "are to be computed. If not specified all chroms in "
-                        "--bed-file will be processed.")
+    return _interpret_like_parser(
+        20210304, parents=(_make_shap_scores_parser(),))
 
-    parser.add_argument('--presort-bed-file', action='store_true', 
-                        help="specify if the --bed-file should be sorted in "
-                        "descending order of enrichment. It is assumed that "
-                        "the --bed-file has 'signalValue' in column 7 to use "
-                        "for sorting.")
-    
-    parser.add_argument('--control-info', type=str,
-                        help="path to the input json file that has paths to "
-                        "control bigWigs. The --task-id is matched with "
-                        "'task_id' in the the json file to get the list of "
-                        "control bigWigs")
 
-    parser.add_argument('--control-smoothing', nargs='+',
-                        help="sigma and window width for gaussian 1d "
-                        "smoothing of the control", default=[7.0, 81])
-    
-    parser.add_argument('--num-shuffles', type=int,
-                        help="the number of dinucleotide shuffles to perform "
-                        "on each input sequence", default=20)   
-    
-    parser.add_argument('--gen-null-dist', action='store_true', 
-                        help="generate null distribution of shap scores by "
-                        "using a dinucleotide shuffled input sequence") 
+@lru_cache(maxsize=1)
+def variant_shap_scores_argsparser():
+    """ Command line arguments for the var_shap script, same as the
+        shap script without the shap_scores only options
 
-    parser.add_argument('--seed', type=int,
-                        help="seed to create a NumPy RandomState object used"
-                        "for performing shuffles", default=20210304)  
-    
-    # output params
-    parser.add_argument('--output-directory', '-o', type=str, required=True,
-                        help="destination directory to store the "
-                        "interpretation scores")
-    
-    parser.add_argument('--automate-filenames', action='store_true', 
-                        help="specify if the interpret output should be stored"
-                        "in a timestamped subdirectory within --output-dir")
+        Returns:
+            argparse.ArgumentParser
+    """
 
-    parser.add_argument('--time-zone', type=str,
-                        help="time zone to use for timestamping output "
-                        "directories", default='US/Pacific')
-    return parser
+    return _interpret_like_parser(20210304)
 
 
+@lru_cache(maxsize=1)
 def modisco_argsparser():
     """ Command line arguments for the run_modisco script
 
@@ -635,7 +911,7 @@ def modisco_argsparser():
             argparse.ArgumentParser
     """
     
-    parser = argparse.ArgumentParser()
+    parser = _ArgumentParser()
     
     parser.add_argument("--scores-path", type=str, 
                         help="Path to the importance scores hdf5 file")
@@ -650,6 +926,7 @@ def modisco_argsparser():
     
     return parser
 
+@lru_cache(maxsize=1)
 def motif_discovery_argsparser():
     """ Command line arguments for the motif_discovery script
 
@@ -657,7 +934,7 @@ def motif_discovery_argsparser():
             argparse.ArgumentParser
     """
     
-    parser = argparse.ArgumentParser()
+    parser = _ArgumentParser()
     
     parser.add_argument("--scores-path", type=str, 
                         help="Path to the importance scores hdf5 file")
@@ -675,6 +952,7 @@ def motif_discovery_argsparser():
                         "discovery", default=400)
     return parser
 
+@lru_cache(maxsize=1)
 def embeddings_argsparser():
     """ Command line arguments for the embeddings script
 
@@ -682,14 +960,11 @@ def embeddings_argsparser():
             argparse.ArgumentParser
     """
     
-    parser = argparse.ArgumentParser()
-    
+    parser = _ArgumentParser(parents=[_make_reference_parser()])
+
     parser.add_argument('--model', '-m', type=str, required=True,
                         help="the path to the model (.h5) file")
-    
-    parser.add_argument('--reference-genome', '-g', type=str, required=True,
-                        help="number of gpus to use")
-    
+
     parser.add_argument('--input-layer-name', type=str, 
                         help="name of the input sequence layer", 
                         default='sequence')
@@ -742,6 +1017,7 @@ def embeddings_argsparser():
     return parser
 
 
+@lru_cache(maxsize=1)
 def logits2profile_argsparser():
     """ Command line arguments for the logits2counts script
 
@@ -749,7 +1025,7 @@ def logits2profile_argsparser():
             argparse.ArgumentParser
     """
     
-    parser = argparse.ArgumentParser()
+    parser = _ArgumentParser()
     
     parser.add_argument('--logits-file', type=str, required=True,
                         help="Path to the logits bigWig file that was "
@@ -784,6 +1060,7 @@ def logits2profile_argsparser():
     return parser
 
 
+@lru_cache(maxsize=1)
 def bounds_argsparser():
     """ Command line arguments for the bounds script
 
@@ -791,15 +1068,15 @@ def bounds_argsparser():
             argparse.ArgumentParser
     """
     
-    parser = argparse.ArgumentParser()
+    parser = _ArgumentParser()
     
     parser.add_argument('--input-profiles', nargs='+',
-                        help="list of input bigWig profile", default=[])
+                        help="list of input bigWig profile", default=())
 
     parser.add_argument('--output-names', nargs='+',
                         help="list of outputnames for the bounds output "
                         "corresponding to each of the input profiles", 
-                        default=[]) 
+                        default=()) 
 
     parser.add_argument('--output-directory', type=str, required=True,
                         help="Path to the output directory")
@@ -820,11 +1097,12 @@ def bounds_argsparser():
         
     parser.add_argument('--smoothing-params', nargs='+',
                         help="sigma and window size for gaussian 1D smoothing "
-                        "of 'observed' and 'predicted' profiles", 
-                        default=[7.0, 81])
+                        "of 'observed' and 'predicted' profiles",
+                        default=(7.0, 81))
 
     return parser
 
+@lru_cache(maxsize=1)
 def counts_loss_weight_argsparser():
     """ Command line arguments for the counts_loss_weight script
 
@@ -832,7 +1110,7 @@ def counts_loss_weight_argsparser():
             argparse.ArgumentParser
     """
 
-    parser = argparse.ArgumentParser()
+    parser = _ArgumentParser()
         
     parser.add_argument('--input-data', '-i', type=str,
                         help="path to json file containing task information", 
@@ -853,3 +1131,94 @@ def counts_loss_weight_argsparser():
                         "script")
     
     return parser
+
+
+def _argcache_dir():
+    """ Directory for the on-disk cache of parsed arguments
+
+        Returns:
+            str: $XDG_CACHE_HOME/basepairmodels/argcache
+    """
+
+    cache_home = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(cache_home, 'basepairmodels', 'argcache')
+
+
+def parse_with_cache(parser_factory, argv=None):
+    """ Parse command line arguments, with the parsed result cached on
+        disk as JSON, so a re-launch with identical arguments skips
+        argparse entirely
+
+        The cache key includes the name of the parser factory and the
+        modification time of this module, so editing the parsers
+        invalidates earlier entries. Since the namespace round trips
+        through JSON, tuple values come back as lists on a cache hit.
+
+        Args:
+            parser_factory (function): one of the *_argsparser
+                functions in this module
+
+            argv (list): list of command line arguments, excluding
+                the program name. If None, sys.argv[1:] is used
+
+        Returns:
+            argparse.Namespace
+    """
+
+    if argv is None:
+        argv = sys.argv[1:]
+    argv = list(argv)
+
+    key = repr((parser_factory.__name__, argv, os.path.getmtime(__file__)))
+    digest = hashlib.blake2b(key.encode()).hexdigest()[:16]
+    cache_file = os.path.join(_argcache_dir(), '{}.json'.format(digest))
+
+    # cache hit
+    try:
+        with open(cache_file, 'r') as fp:
+            return argparse.Namespace(**json.load(fp))
+    except (OSError, ValueError, TypeError):
+        pass
+
+    args = parser_factory().parse_args(argv)
+
+    # cache miss, write the parsed arguments to a temp file first so
+    # that concurrent launches never read a partially written file
+    try:
+        serialized = json.dumps(vars(args))
+
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        with open(tmp_file, 'w') as fp:
+            fp.write(serialized)
+        os.replace(tmp_file, cache_file)
+    except (OSError, TypeError, ValueError):
+        # caching is best effort only
+        pass
+
+    return args
+
+def __getattr__(name):
+    """ Lazily build a parser on module attribute access, e.g.
+        `argparsers.training_parser` returns `training_argsparser()`
+
+        Module level __getattr__ (PEP 562) requires python >= 3.7. On
+        python 3.6 the attribute lookup raises AttributeError, call
+        the factory (e.g. `training_argsparser()`) directly instead.
+
+        Args:
+            name (str): name of the attribute
+
+        Returns:
+            argparse.ArgumentParser
+    """
+
+    if name.endswith('_parser'):
+        factory = globals().get(name[:-len('_parser')] + '_argsparser')
+        if factory is not None:
+            return factory()
+
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
@@ -42,8 +42,7 @@ from basepairmodels.common import model_archs, training
 
 def main():
     # parse the command line arguments
-    parser = argparsers.training_argsparser()
-    args = parser.parse_args()
+    args = argparsers.get_training_args()
 
     # input params
     input_params = {}
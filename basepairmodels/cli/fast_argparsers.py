@@ -0,0 +1,229 @@
+"""
+
+    This module contains a faster drop in replacement for parsing the
+    command line arguments of the CLI scripts.
+
+    A FastArgumentParser compiles the actions of an argparse parser
+    (from `argparsers`) into a flat option string lookup table once,
+    and parses well formed command lines with a single pass over the
+    tokens. Anything the fast path does not handle (-h/--help,
+    abbreviated or unknown options, missing required arguments,
+    invalid values, '--' etc.) is delegated to the argparse parser, so
+    help output and error messages are exactly the same as before.
+
+"""
+
+import argparse
+import sys
+
+from functools import lru_cache
+
+
+class FastArgumentParser:
+    """
+        Single pass command line parser built from an
+        argparse.ArgumentParser
+
+        Args:
+            parser (argparse.ArgumentParser): the parser whose actions
+                are compiled into the lookup table, also used as the
+                fallback
+
+    """
+
+    # the nargs values the fast path knows how to consume
+    SUPPORTED_NARGS = (None, 0, '+')
+
+    def __init__(self, parser):
+        self.parser = parser
+
+        # map from each option string (e.g. '--batch-size' & '-b') to
+        # its action
+        self.option_actions = {}
+
+        # all actions that store a value in the namespace
+        self.actions = []
+
+        # False if the parser has arguments that the fast path cannot
+        # handle, in which case we always delegate to argparse
+        self.supported = True
+
+        for action in parser._actions:
+            # -h/--help is intentionally left out of the lookup table
+            # so that it falls back to argparse
+            if isinstance(action, argparse._HelpAction):
+                continue
+
+            if not action.option_strings or \
+                    action.nargs not in self.SUPPORTED_NARGS:
+                self.supported = False
+
+            for option_string in action.option_strings:
+                self.option_actions[option_string] = action
+
+            if action.dest is not argparse.SUPPRESS and \
+                    action.default is not argparse.SUPPRESS:
+                self.actions.append(action)
+
+    def _is_value(self, arg_string):
+        """
+            Check if a command line token is a value (as opposed to
+            an option string), following the same rules as argparse
+
+            Args:
+                arg_string (str): the command line token
+
+            Returns:
+                bool: True if `arg_string` is a value
+        """
+
+        if len(arg_string) < 2 or arg_string[0] != '-':
+            return True
+
+        # argparse first tries to match anything that starts with '-'
+        # as an option, including '--option=value', abbreviations and
+        # '-xVALUE'
+        option_prefix = arg_string.split('=', 1)[0]
+        if arg_string[1] != '-' and arg_string[:2] in self.option_actions:
+            return False
+        for option_string in self.option_actions:
+            if option_string.startswith(option_prefix):
+                return False
+
+        # negative numbers are values, unless the parser has options
+        # that look like negative numbers
+        if self.parser._negative_number_matcher.match(arg_string):
+            return not self.parser._has_negative_number_optionals
+
+        return ' ' in arg_string
+
+    def _parse(self, args):
+        """
+            The fast path
+
+            Args:
+                args (list): list of command line tokens
+
+            Returns:
+                argparse.Namespace: the parsed arguments, None if the
+                    command line has to be handled by argparse
+        """
+
+        parser = self.parser
+
+        # add the defaults
+        namespace = argparse.Namespace()
+        for action in self.actions:
+            setattr(namespace, action.dest, action.default)
+        for dest, value in parser._defaults.items():
+            setattr(namespace, dest, value)
+
+        seen_actions = set()
+
+        num_args = len(args)
+        idx = 0
+        while idx < num_args:
+            option_string = args[idx]
+            explicit_value = None
+
+            # --option=value
+            if option_string.startswith('--') and '=' in option_string:
+                option_string, explicit_value = option_string.split('=', 1)
+
+            action = self.option_actions.get(option_string)
+            if action is None:
+                return None
+            idx += 1
+
+            # collect the values that follow the option string
+            if explicit_value is not None:
+                arg_strings = [explicit_value]
+            else:
+                end = idx
+                if action.nargs != 0:
+                    while end < num_args and self._is_value(args[end]):
+                        end += 1
+                arg_strings = args[idx:end]
+                idx = end
+
+            if action.nargs == 0 and arg_strings:
+                return None
+            if action.nargs is None and len(arg_strings) != 1:
+                return None
+            if action.nargs == '+' and not arg_strings:
+                return None
+
+            # type conversion & checking choices
+            try:
+                values = parser._get_values(action, arg_strings)
+                action(parser, namespace, values, option_string)
+            except argparse.ArgumentError:
+                return None
+
+            seen_actions.add(action)
+
+        for action in self.actions:
+            if action in seen_actions:
+                continue
+
+            if action.required:
+                return None
+
+            # argparse runs string defaults through the action's type
+            if isinstance(action.default, str) and \
+                    getattr(namespace, action.dest) is action.default:
+                try:
+                    setattr(namespace, action.dest,
+                            parser._get_value(action, action.default))
+                except argparse.ArgumentError:
+                    return None
+
+        # the post parse type conversion of argparsers._ArgumentParser
+        if hasattr(parser, '_coerce'):
+            try:
+                parser._coerce(namespace)
+            except argparse.ArgumentError:
+                return None
+
+        return namespace
+
+    def parse_args(self, args=None):
+        """
+            Parse the command line arguments
+
+            Args:
+                args (list): list of command line arguments, excluding
+                    the program name. If None, sys.argv[1:] is used
+
+            Returns:
+                argparse.Namespace
+        """
+
+        if args is None:
+            args = sys.argv[1:]
+        else:
+            args = list(args)
+
+        if self.supported:
+            namespace = self._parse(args)
+            if namespace is not None:
+                return namespace
+
+        return self.parser.parse_args(args)
+
+
+@lru_cache(maxsize=None)
+def get_fast_parser(parser_factory):
+    """
+        Get the fast parser for one of the parser factories in
+        `argparsers`, e.g. get_fast_parser(predict_argsparser)
+
+        Args:
+            parser_factory (function): the function that returns the
+                argparse.ArgumentParser
+
+        Returns:
+            FastArgumentParser
+    """
+
+    return FastArgumentParser(parser_factory())
@@ -111,6 +111,10 @@ def interpret(args, interpret_dir):
     # to a dataframe and write it out to a new file
     rows = []
     
+    # sigma & window width of the gaussian used to smooth the control
+    # profiles
+    sigma, window_width = args.control_smoothing[0]
+    
     # iterate through all the peaks
     for idx, row in peaks_df.iterrows():
         
@@ -143,9 +147,9 @@ def interpret(args, interpret_dir):
 
             # read the values from the control bigWigs
             for i in range(len(control_bigWigs)):
-                vals = np.nan_to_num(
-                    control_bigWigs[i].values(row['chrom'], start, end))
-                bias_counts_input[idx, 0] += np.sum(vals)
+                vals = np.nan_to_num(control_bigWigs[i].values(
+                    row['chrom'], start, end, numpy=True), copy=False)
+                bias_counts_input[idx, 0] += np.sum(vals, dtype=np.float64)
                 bias_profile_input[idx, :, 0] += vals
             
             # we need to take the log of the sum of counts
@@ -154,8 +158,6 @@ def interpret(args, interpret_dir):
             bias_counts_input[idx, 0] = np.log(bias_counts_input[idx, 0] + 1)
                          
             # compute the smoothed control profile
-            sigma = float(args.control_smoothing[0])
-            window_width = int(args.control_smoothing[1])
             bias_profile_input[idx, :, 1] = gaussian1D_smoothing(
                 bias_profile_input[idx, :, 0], sigma, window_width)
 
@@ -74,7 +74,8 @@ def motif_discovery_main():
     print("Shap scores shape - {}".format(scores['hyp_scores'].shape))
     
     shap_scores = scores['hyp_scores'][:,start:end,:]
-    one_hot_seqs = scores['input_seqs'][:,start:end,:]
+    # the one hot sequences are stored as uint8
+    one_hot_seqs = scores['input_seqs'][:,start:end,:].astype(np.float32)
     print("Done slicing shap scores and one hot seqs")
     
     proj_shap_scores = np.multiply(one_hot_seqs, shap_scores)
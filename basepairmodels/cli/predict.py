@@ -43,6 +43,7 @@ from basepairmodels.cli import argparsers
 from basepairmodels.cli import bigwigutils
 from basepairmodels.cli import logger
 from basepairmodels.cli.exceptionhandler import NoTracebackException
+from basepairmodels.cli.fast_argparsers import get_fast_parser
 from basepairmodels.cli.losses import MultichannelMultinomialNLL
 from basepairmodels.cli.losses import multinomial_nll
 from basepairmodels.common.attribution_prior import AttributionPriorModel
@@ -312,7 +313,7 @@ def predict(args, input_data, pred_dir):
         
 def predict_main():
     # parse the command line arguments
-    parser = argparsers.predict_argsparser()
+    parser = get_fast_parser(argparsers.predict_argsparser)
     args = parser.parse_args()
 
     # check if the output directory exists
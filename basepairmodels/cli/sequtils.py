@@ -0,0 +1,132 @@
+"""
+
+    This module contains helper functions to work with DNA sequences
+    as arrays of base indices (0-3 for ACGT, 4 for N), which only
+    depend on numpy.
+
+"""
+
+import numpy as np
+
+
+# number of sequences that dinuc_shuffle_batch shuffles at a time
+DINUC_SHUFFLE_CHUNK_SIZE = 1024
+
+
+# lookup table to convert the bytes of an ascii sequence to base
+# indices, upper & lower case ACGT map to 0-3, every other character
+# (N etc.) maps to 4
+BASE_INDEX_TABLE = np.full(256, 4, dtype=np.uint8)
+BASE_INDEX_TABLE[np.frombuffer(b'ACGTacgt', dtype=np.uint8)] = \
+    [0, 1, 2, 3, 0, 1, 2, 3]
+
+# one hot vectors of the base indices, index 4 (N) maps to all zeros
+TOKEN_ONE_HOT = np.identity(5, dtype=np.uint8)[:, :-1]
+
+
+def seq_to_tokens(seq):
+    """
+        Convert an ascii sequence to base indices using 
+        `BASE_INDEX_TABLE`
+
+        Args:
+            seq (str or bytes): the ascii sequence
+
+        Returns:
+            numpy.ndarray: uint8 array of length len(seq)
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode('ascii')
+
+    return np.take(BASE_INDEX_TABLE, np.frombuffer(seq, dtype=np.uint8))
+
+
+def dinuc_shuffle_batch(tokens, rng, chunk_size=DINUC_SHUFFLE_CHUNK_SIZE):
+    """
+        Dinucleotide shuffle a batch of sequences, one shuffle per
+        sequence. This is the same algorithm as deeplift's 
+        dinuc_shuffle (a random walk over the shuffled successor 
+        lists of each base, with the last successor of every base 
+        kept in place), vectorized across the sequences. The random
+        numbers are drawn differently, so for the same seed the
+        shuffles differ from calling dinuc_shuffle on each sequence.
+
+        Args:
+            tokens (numpy.ndarray): integer array of shape 
+                N x sequence_length of base indices (e.g. from
+                seq_to_tokens)
+
+            rng (numpy.random.RandomState): used for the shuffles
+            
+            chunk_size (int): number of sequences shuffled at a time,
+                the temporary arrays are proportional to
+                chunk_size x sequence_length
+
+        Returns:
+            numpy.ndarray: the shuffled base indices, same shape and
+                dtype as `tokens`
+    """
+
+    shuffled = np.empty_like(tokens)
+    for start in range(0, tokens.shape[0], chunk_size):
+        end = start + chunk_size
+        shuffled[start:end] = _dinuc_shuffle_chunk(tokens[start:end], rng)
+
+    return shuffled
+
+
+def _dinuc_shuffle_chunk(tokens, rng):
+    """
+        Dinucleotide shuffle all the sequences in `tokens` at once,
+        see `dinuc_shuffle_batch`
+
+        Args:
+            tokens (numpy.ndarray): integer array of shape 
+                N x sequence_length of base indices
+
+            rng (numpy.random.RandomState): used for the shuffles
+
+        Returns:
+            numpy.ndarray: the shuffled base indices
+    """
+
+    num_seqs, seq_len = tokens.shape
+    if num_seqs == 0 or seq_len < 3:
+        return tokens.copy()
+
+    num_tokens = int(tokens.max()) + 1
+    rows = np.arange(num_seqs)
+
+    # positions 0 .. seq_len - 2, each of which has a successor
+    prev_tokens = tokens[:, :-1]
+
+    # random sort keys to shuffle the successors of each base, the
+    # successor of the last occurrence of a base stays at the end
+    keys = rng.random_sample(prev_tokens.shape)
+    counts = np.zeros((num_seqs, num_tokens), dtype=np.intp)
+    for t in range(num_tokens):
+        mask = prev_tokens == t
+        counts[:, t] = np.sum(mask, axis=1)
+        last = seq_len - 2 - np.argmax(mask[:, ::-1], axis=1)
+        present = counts[:, t] > 0
+        keys[rows[present], last[present]] = 2.0
+
+    # for each sequence, the successor positions grouped by base & in
+    # shuffled order within each group
+    successors = np.lexsort((keys, prev_tokens)) + 1
+
+    # index of the next unused successor of each base
+    next_idx = np.cumsum(counts, axis=1) - counts
+
+    # walk the shuffled successor lists
+    shuffled = np.empty_like(tokens)
+    shuffled[:, 0] = tokens[:, 0]
+    pos = np.zeros(num_seqs, dtype=np.intp)
+    for j in range(1, seq_len):
+        t = tokens[rows, pos]
+        pos = successors[rows, next_idx[rows, t]]
+        next_idx[rows, t] += 1
+        shuffled[:, j] = tokens[rows, pos]
+
+    return shuffled
@@ -1,28 +1,116 @@
-import h5py
+import hashlib
 import json
 import numpy as np
-import pandas as pd
-import pyBigWig
-import pysam
-import shap
-import tensorflow as tf
-import tensorflow_probability as tfp
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
 from basepairmodels.cli.argparsers import shap_scores_argsparser
 from basepairmodels.cli.bpnetutils import *
 from basepairmodels.cli.exceptionhandler import NoTracebackException
-from basepairmodels.cli.shaputils import *
 from basepairmodels.cli.logger import *
-from basepairmodels.cli.losses import MultichannelMultinomialNLL
-from mseqgen.sequtils import one_hot_encode
-from mseqgen.utils import gaussian1D_smoothing
-from tensorflow.keras.models import load_model
-from tensorflow.keras.utils import CustomObjectScope
+from basepairmodels.cli.sequtils import dinuc_shuffle_batch
+from basepairmodels.cli.sequtils import seq_to_tokens
+from basepairmodels.cli.sequtils import TOKEN_ONE_HOT
 
+# tensorflow, shap & the file format libraries take seconds to import,
+# so they are imported inside the functions that need them, after the
+# command line arguments have been parsed & checked
 
-def save_scores(peaks_df, one_hot_sequences, hyp_shap_scores, output_fname):
+
+# number of examples per chunk of the hyp_scores & input_seqs datasets
+SCORES_CHUNK_SIZE = 64
+
+
+# a block of peaks is extended with the next peak on the same 
+# chromosome if the gap between them is at most FETCH_BLOCK_MAX_GAP
+# & the block spans at most FETCH_BLOCK_MAX_SPAN bases
+FETCH_BLOCK_MAX_GAP = 20000
+FETCH_BLOCK_MAX_SPAN = 5000000
+
+
+def get_fetch_blocks(chroms, starts, ends):
     """
-        Function to save shap scores to HDF5 file
+        Group the peaks into blocks of nearby peaks on the same
+        chromosome, so that the reference sequence of each block can
+        be fetched with one call
+        
+        Args:
+            chroms (numpy.ndarray): chromosome of each peak
+            
+            starts (numpy.ndarray): start coordinate of each peak
+            
+            ends (numpy.ndarray): end coordinate of each peak
+            
+        Returns:
+            list: list of (chrom, numpy array of peak indices) tuples,
+                the peaks in each block sorted by start
+    """
+    
+    blocks = []
+    block = []
+    for idx in np.lexsort((starts, chroms)):
+        if len(block) > 0 and chroms[idx] == chroms[block[0]] and \
+                starts[idx] - block_end <= FETCH_BLOCK_MAX_GAP and \
+                ends[idx] - starts[block[0]] <= FETCH_BLOCK_MAX_SPAN:
+            block.append(idx)
+            block_end = max(block_end, ends[idx])
+            continue
+        
+        if len(block) > 0:
+            blocks.append((chroms[block[0]], np.array(block)))
+        block = [idx]
+        block_end = ends[idx]
+    
+    if len(block) > 0:
+        blocks.append((chroms[block[0]], np.array(block)))
+    
+    return blocks
+
+
+def fetch_block_sequences(fasta_ref, chrom, starts, ends):
+    """
+        Fetch the reference sequences of a block of peaks on the same
+        chromosome with one call, see get_fetch_blocks
+        
+        Args:
+            fasta_ref (pysam.FastaFile): the reference genome
+            
+            chrom (str): chromosome of the peaks
+            
+            starts (numpy.ndarray): start coordinate of each peak
+            
+            ends (numpy.ndarray): end coordinate of each peak
+            
+        Returns:
+            list: the base indices (uint8 array) of each peak's 
+                sequence, clipped to the chromosome, so peaks that
+                start before 0 or end past the end of the chromosome
+                have sequences shorter than end - start
+    """
+    
+    chrom_len = fasta_ref.get_reference_length(chrom)
+    
+    # fetch the reference sequence of the whole block once, clipped
+    # to the chromosome
+    block_start = max(0, int(np.min(starts)))
+    block_end = min(chrom_len, int(np.max(ends)))
+    if block_end > block_start:
+        block_tokens = seq_to_tokens(
+            fasta_ref.fetch(chrom, block_start, block_end))
+    else:
+        block_tokens = np.zeros(0, dtype=np.uint8)
+    
+    return [block_tokens[max(0, start - block_start):
+                         max(0, min(end, chrom_len) - block_start)]
+            for start, end in zip(starts, ends)]
+
+
+def create_scores_file(peaks_df, one_hot_sequences, output_fname):
+    """
+        Function to create the HDF5 file for the shap scores, with the
+        chrom positions & the one hot sequences. The 'hyp_scores'
+        dataset is created empty, to be filled in batch by batch as
+        the shap scores are computed
         
         Args:
             peaks_df (pandas.Dataframe): a pandas dataframe that
@@ -30,16 +118,16 @@ def save_scores(peaks_df, one_hot_sequences, hyp_shap_scores, output_fname):
                 positions
                 
             one_hot_sequences (numpy.ndarray): numpy array of shape
-                N x sequence_length x 4
-
-            hyp_shap_scores (numpy.ndarray): shap scores corresponding
-                to the input sequences (hypothetical contributions);
-                numpy array of shape N x sequence_length x 4
+                N x sequence_length x 4, saved as uint8
                 
             output_fname (str): path to the output .h5 file
             
+        Returns:
+            h5py.File: the open file, the caller has to close it
     """
     
+    import h5py
+    
     # get the chroms, starts and ends as lists
     coords_chrom = peaks_df['chrom'].values
     coords_start = peaks_df['start'].values
@@ -48,6 +136,17 @@ def save_scores(peaks_df, one_hot_sequences, hyp_shap_scores, output_fname):
     num_examples = peaks_df.shape[0]
     seq_len = one_hot_sequences.shape[1]
     
+    # the large hyp_scores & input_seqs datasets are chunked along the
+    # examples, compressed with lzf (much faster than gzip) and
+    # written a few chunks at a time
+    block_size = max(1, min(SCORES_CHUNK_SIZE, num_examples))
+    chunks = (block_size, seq_len, 4)
+    
+    # h5py rejects chunks larger than the data, if there are no 
+    # examples let h5py pick the chunk shape
+    if num_examples == 0:
+        chunks = None
+    
     # open the HDF% file for writing
     f = h5py.File(output_fname, "w")
     
@@ -68,21 +167,108 @@ def save_scores(peaks_df, one_hot_sequences, hyp_shap_scores, output_fname):
     coords_end_dset[:] = coords_end
         
     hyp_scores_dset = f.create_dataset(
-        "hyp_scores", (num_examples, seq_len, 4), compression="gzip"
+        "hyp_scores", (num_examples, seq_len, 4), dtype=np.float32,
+        chunks=chunks, compression="lzf", shuffle=True
     )
-    hyp_scores_dset[:, :, :] = hyp_shap_scores
 
     input_seqs_dset = f.create_dataset(
-        "input_seqs", (num_examples, seq_len, 4), compression="gzip"
+        "input_seqs", (num_examples, seq_len, 4), dtype=np.uint8,
+        chunks=chunks, compression="lzf", shuffle=True
     )
-    input_seqs_dset[:, :, :] = one_hot_sequences
     
-    f.close()
+    for start in range(0, num_examples, block_size):
+        end = min(start + block_size, num_examples)
+        input_seqs_dset[start:end] = one_hot_sequences[start:end]
+    
+    return f
+
+
+def explain_in_batches(explainers, X, bias_inputs, batch_size, 
+                       references, outputs):
+    """
+        Compute the hypothetical shap scores of the one hot sequences 
+        in batches & write each batch to the outputs as soon as it is
+        done. Every batch is run through all the explainers back to
+        back so that they can share the shuffled references of the
+        batch. If a batch runs out of GPU memory the batch size is
+        halved & the batch is retried
+        
+        Args:
+            explainers (list): list of 
+                shap.explainers.deep.TFDeepExplainer, e.g. for the 
+                counts & profile heads
+                
+            X (numpy.ndarray): one hot sequences of shape
+                N x sequence_length x 4
+                
+            bias_inputs (list): the matching bias (control) input,
+                N rows, for each of the explainers
+                
+            batch_size (int): number of sequences per explainer call
+            
+            references (dict): the cache of shuffled references used 
+                by the explainers' data function, cleared after every 
+                batch
+                
+            outputs (list): for each of the explainers, an array like
+                of shape N x sequence_length x 4 (e.g. the 'hyp_scores'
+                h5py.Dataset) that the scores are written to
+    """
+    
+    import tensorflow as tf
+    
+    num_examples = X.shape[0]
     
+    start = 0
+    while start < num_examples:
+        end = min(start + batch_size, num_examples)
+        
+        # contiguous float32 batch for the explainers
+        X_batch = np.ascontiguousarray(X[start:end], dtype=np.float32)
+        try:
+            for i, explainer in enumerate(explainers):
+                batch_scores = explainer.shap_values(
+                    [X_batch, bias_inputs[i][start:end]], progress_message=100)
+                outputs[i][start:end] = batch_scores[0]
+        except tf.errors.ResourceExhaustedError:
+            if batch_size == 1:
+                raise
+            
+            batch_size = batch_size // 2
+            logging.warn("Out of memory, reducing shap batch size to "
+                         "{}".format(batch_size))
+            continue
+        finally:
+            references.clear()
+        
+        logging.info("Done {} of {}".format(end, num_examples))
+        start = end
+
+
 def shap_scores(args, shap_dir):
+    import pandas as pd
+    import pyBigWig
+    import pysam
+    import shap
+    import tensorflow as tf
+    
+    from basepairmodels.cli.shaputils import combine_mult_and_diffref
+    from basepairmodels.cli.shaputils import freeze_graph
+    from basepairmodels.cli.shaputils import get_weightedsum_meannormed_logits
+    from basepairmodels.cli.shaputils import mixed_precision_model
+    from deeplift.dinuc_shuffle import dinuc_shuffle
+    from scipy.ndimage import gaussian_filter1d
+    from tensorflow.keras.models import load_model
+    
     # load the model
     model = load_model(args.model)
     
+    if args.mixed_precision:
+        # float16 compute halves the memory traffic of the 
+        # convolutions that the explainers run over and over
+        logging.info("Rebuilding the model with mixed precision ...")
+        model = mixed_precision_model(model)
+    
     # read all the peaks into a pandas dataframe
     peaks_df = pd.read_csv(args.bed_file, sep='\t', header=None, 
                            names=['chrom', 'st', 'end', 'name', 'score',
@@ -103,9 +289,13 @@ def shap_scores(args, shap_dir):
         # sort the bed file in descending order of peak strength
         peaks_df = peaks_df.sort_values(['signalValue'], ascending=False)
     
-    # reset index (if any of the above 3 filters have been applied, 
-    # no harm if they haven't)
-    peaks_df = peaks_df.reset_index(drop=True)
+    # reset index only if any of the above 3 filters have been
+    # applied, so the new columns below are added to a fresh frame
+    # and not to a slice (the peaks are accessed by position, and
+    # read_csv already returns a frame with a range index)
+    if args.chroms is not None or args.sample is not None or \
+            args.presort_bed_file:
+        peaks_df = peaks_df.reset_index(drop=True)
     
     # add new columns for start and stop based on 'summit' position
     peaks_df['start'] = peaks_df['st'] + peaks_df['summit'] - \
@@ -117,14 +307,9 @@ def shap_scores(args, shap_dir):
     num_peaks = peaks_df.shape[0]
     logging.info("#Peaks - {}".format(num_peaks))
     
-    # reference file to fetch sequences
-    logging.info("Opening reference file ...")
-    #REFERENCE FILE HERE
-    fasta_ref = pysam.FastaFile(args.reference_genome) 
-        
     # if controls have been specified we to need open the control files
     # for reading
-    control_bigWigs = []
+    control_bigWig_paths = []
     if args.control_info is not None:
         # load the control info json file
         with open(args.control_info, 'r') as inp_json:
@@ -150,107 +335,196 @@ def shap_scores(args, shap_dir):
                     
                     logging.info(control_bigWig_path)
                     
-                    # open the bigWig and add the file object to the 
-                    # list
-                    control_bigWigs.append(pyBigWig.open(control_bigWig_path))
+                    # add the bigWig to the list, the file is opened
+                    # separately in each of the fetching threads
+                    control_bigWig_paths.append(control_bigWig_path)
 
     # log of sum of counts of the control track
     # if multiple control files are specified this would be
     # log(sum(position_wise_sum_from_all_files))
-    bias_counts_input = np.zeros((num_peaks, 1))
+    bias_counts_shape = (num_peaks, 1)
 
     # the control profile and the smoothed version of the control 
     # profile (1 + 1 = 2, always :) )
     # if multiple control files are specified, the control profile for
     # each sample would be position_wise_sum_from_all_files
-    bias_profile_input = np.zeros((num_peaks, args.control_len, 2))
+    bias_profile_shape = (num_peaks, args.control_len, 2)
+    
+    if len(control_bigWig_paths) > 0:
+        bias_counts_input = np.zeros(bias_counts_shape)
+        bias_profile_input = np.zeros(bias_profile_shape)
+    else:
+        ## IF NO CONTROL BIGWIGS ARE SPECIFIED THEN THE TWO INPUTS ARE
+        ## ALL ZEROS, SO WE USE READ ONLY VIEWS OF A SINGLE ROW OF
+        ## ZEROS INSTEAD OF ALLOCATING THEM
+        bias_counts_input = np.broadcast_to(
+            np.zeros((1,) + bias_counts_shape[1:]), bias_counts_shape)
+        bias_profile_input = np.broadcast_to(
+            np.zeros((1,) + bias_profile_shape[1:]), bias_profile_shape)
+    
+    # the sequences as base indices (see sequtils.BASE_INDEX_TABLE),
+    # filled in as the sequences are fetched, all N's to start with
+    seqs = np.full((num_peaks, args.input_seq_len), 4, dtype=np.uint8)
     
-    ## IF NO CONTROL BIGWIGS ARE SPECIFIED THEN THE TWO NUMPY ARRAYS
-    ## bias_counts_input AND bias_profile_input WILL REMAIN ZEROS
+    # the peak columns as numpy arrays, so we don't construct a
+    # pandas row for every peak
+    chroms = peaks_df['chrom'].to_numpy()
+    starts = peaks_df['start'].to_numpy()
+    ends = peaks_df['end'].to_numpy()
+    sts = peaks_df['st'].to_numpy()
+    summits = peaks_df['summit'].to_numpy()
     
-    # list to hold all the sequences for the peaks
-    sequences = []
+    # open the reference once on the main thread, which builds the
+    # .fai index if it doesn't exist yet, so the threads below don't
+    # race to build it
+    logging.info("Opening reference file ...")
+    pysam.FastaFile(args.reference_genome).close()
+    
+    # pysam & pyBigWig file objects can't be shared between threads,
+    # so each thread opens its own reference & control files
+    thread_handles = threading.local()
     
-    # iterate through all the peaks
-    for idx, row in peaks_df.iterrows():
-        start = row['start']
-        end = row['end']
+    # all the files opened by the threads, closed once all the blocks
+    # have been fetched
+    opened_files = []
+    
+    def fetch_block(block):
+        """
+            Fetch the reference sequences & the control values for a
+            block of peaks (runs in the thread pool). The sequences &
+            the control profiles are written to the peaks' rows in 
+            seqs & bias_profile_input
+            
+            Args:
+                block (tuple): (chrom, numpy array of the indices of
+                    the peaks in peaks_df), see get_fetch_blocks
+        """
         
-        # fetch the reference sequence at the peak location
-        try:
-            #SEQUENCE IS OBTAINED HERE
-            seq = fasta_ref.fetch(row['chrom'], start, end).upper()        
-        except ValueError: # start/end out of range
-            logging.warn("Unable to fetch reference sequence at peak: "
-                         "{} {}-{}.".format(row['chrom'], start, end))
+        if not hasattr(thread_handles, 'fasta_ref'):
+            # reference file to fetch sequences
+            thread_handles.fasta_ref = pysam.FastaFile(args.reference_genome)
+            thread_handles.control_bigWigs = [
+                pyBigWig.open(path) for path in control_bigWig_paths]
             
-            # use string of N's as a substitute
-            seq = 'N'*args.input_seq_len
+            # list.append & list.extend are atomic, no lock needed
+            opened_files.append(thread_handles.fasta_ref)
+            opened_files.extend(thread_handles.control_bigWigs)
+        
+        chrom, peak_idxs = block
+        
+        peak_tokens = fetch_block_sequences(
+            thread_handles.fasta_ref, chrom, starts[peak_idxs], 
+            ends[peak_idxs])
+        
+        # the control values of the whole block, a different start 
+        # and end for controls since control_len is usually not the
+        # same as input_seq_len
+        if len(control_bigWig_paths) > 0:
+            control_starts = sts[peak_idxs] + summits[peak_idxs] - \
+                (args.control_len // 2)
+            control_ends = sts[peak_idxs] + summits[peak_idxs] + \
+                (args.control_len // 2)
+            control_block_start = int(np.min(control_starts))
+            control_block_end = int(np.max(control_ends))
             
-        # check if we have the required length
-        if len(seq) != args.input_seq_len:
-            logging.warn("Reference genome doesn't have required sequence " 
-                         "length ({}) at peak: {} {}-{}. Returned length {}. "
-                         "Using all N's.".format(
-                             args.input_seq_len, row['chrom'], start, end, 
-                             len(seq)))
+            # position wise sum of the values from all the control
+            # bigWigs
+            control_block_vals = np.zeros(
+                control_block_end - control_block_start)
+            for control_bigWig in thread_handles.control_bigWigs:
+                control_block_vals += np.nan_to_num(control_bigWig.values(
+                    chrom, control_block_start, control_block_end, 
+                    numpy=True))
+        
+        for i, idx in enumerate(peak_idxs):
+            start = starts[idx]
+            end = ends[idx]
+            seq_len = len(peak_tokens[i])
             
-            # use string of N's as a substitute
-            seq = 'N'*args.input_seq_len     
-        #MODIFY SEQUENCE HERE
-        # fetch control values
-        if len(control_bigWigs) > 0:
-            # a different start and end for controls since control_len
-            # is usually not the same as input_seq_len
-            start = row['st'] + row['summit'] - (args.control_len // 2)
-            end =  row['st'] + row['summit'] + (args.control_len // 2)
-
-            # read the values from the control bigWigs
-            for i in range(len(control_bigWigs)):
-                vals = np.nan_to_num(
-                    control_bigWigs[i].values(row['chrom'], start, end))
-                bias_counts_input[idx, 0] += np.sum(vals)
-                bias_profile_input[idx, :, 0] += vals
+            if start < 0: # start out of range
+                logging.warn("Unable to fetch reference sequence at peak: "
+                             "{} {}-{}.".format(chrom, start, end))
             
-            # we need to take the log of the sum of counts
-            # we add 1 to avoid taking log of 0
-            # same as mseqgen does while generating batches
-            bias_counts_input[idx, 0] = np.log(bias_counts_input[idx, 0] + 1)
-                         
-            # compute the smoothed control profile
-            sigma = float(args.control_smoothing[0])
-            window_width = int(args.control_smoothing[1])
-            bias_profile_input[idx, :, 1] = gaussian1D_smoothing(
-                bias_profile_input[idx, :, 0], sigma, window_width)
+            # check if we have the required length
+            elif seq_len != args.input_seq_len:
+                logging.warn("Reference genome doesn't have required "
+                             "sequence length ({}) at peak: {} {}-{}. "
+                             "Returned length {}. Using all N's.".format(
+                                 args.input_seq_len, chrom, start, end, 
+                                 seq_len))
+            
+            # the rows of the peaks that fail the checks above remain
+            # all N's
+            else:
+                seqs[idx] = peak_tokens[i]
+        
+            # slice the peak's control values out of the block
+            if len(control_bigWig_paths) > 0:
+                bias_profile_input[idx, :, 0] = control_block_vals[
+                    control_starts[i] - control_block_start:
+                    control_ends[i] - control_block_start]
+    
+    # group the peaks into blocks of nearby peaks on the same 
+    # chromosome
+    blocks = get_fetch_blocks(chroms, starts, ends)
+    
+    logging.info("Fetching sequences & control values for {} blocks of "
+                 "peaks using {} threads ...".format(len(blocks), args.threads))
+    
+    # the blocks write to different rows of the arrays, so they can
+    # be fetched concurrently
+    try:
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            for _ in executor.map(fetch_block, blocks):
+                pass
+    finally:
+        for opened_file in opened_files:
+            opened_file.close()
 
-        # append to the list of sequences
-        sequences.append(seq)
+    if len(control_bigWig_paths) > 0:
+        # we need to take the log of the sum of counts
+        # we add 1 to avoid taking log of 0
+        # same as mseqgen does while generating batches
+        bias_counts_input[:, 0] = np.log(
+            np.sum(bias_profile_input[:, :, 0], axis=1) + 1)
+        
+        # compute the smoothed control profiles of all the peaks in
+        # one go, with the same gaussian window as mseqgen's 
+        # gaussian1D_smoothing
+        sigma, window_width = args.control_smoothing[0]
+        truncate = (((window_width - 1)/2)-0.5)/sigma
+        bias_profile_input[:, :, 1] = gaussian_filter1d(
+            bias_profile_input[:, :, 0], sigma=sigma, truncate=truncate, 
+            axis=1)
 
     # if null distribution is requested
-    null_sequences = []
     if args.gen_null_dist:
         logging.info("generating null sequences ...")
         rng = np.random.RandomState(args.seed)
         
-        # iterate over sequences and get the dinucleotide shuffled
-        # sequence for each of them
-        for seq in sequences:
-            # get a list of shuffled seqs. Since we are setting
-            # num_shufs to 1, the returned list will be of size 1
-            shuffled_seqs = dinuc_shuffle(seq, 1, rng)
-            null_sequences.append(shuffled_seqs[0])
-        
-        # null sequences are now our actual sequences
-        sequences = null_sequences[:]
+        # dinucleotide shuffle all the sequences in one go, the null
+        # sequences are now our actual sequences
+        seqs = dinuc_shuffle_batch(seqs, rng)
 
     # one hot encode all the sequences
-    X = one_hot_encode(sequences, args.input_seq_len)
+    X = TOKEN_ONE_HOT[seqs]
     print("X shape", X.shape)
         
+    # the dinucleotide shuffled references of the sequences in the 
+    # current batch, the counts & profile explainers call data_func 
+    # with the same sequences, and since the shuffles are seeded the
+    # same way for every sequence they can share the references
+    references = {}
+    
     # inline function to handle dinucleotide shuffling
     def data_func(model_inputs):
-        rng = np.random.RandomState(args.seed)
-        return [dinuc_shuffle(model_inputs[0], args.num_shuffles, rng)] + \
+        key = hashlib.blake2b(model_inputs[0].tobytes()).digest()
+        if key not in references:
+            rng = np.random.RandomState(args.seed)
+            references[key] = dinuc_shuffle(
+                model_inputs[0], args.num_shuffles, rng)
+            
+        return [references[key]] + \
         [
             np.tile(
                 np.zeros_like(model_inputs[i]),
@@ -258,44 +532,51 @@ def shap_scores(args, shap_dir):
             ) for i in range(1, len(model_inputs))
         ]
     
+    # the outputs of the counts & profile heads that we explain
+    model_inputs = model.input
+    counts_output = tf.reduce_sum(model.outputs[1], axis=-1)
+    weightedsum_meannormed_logits = get_weightedsum_meannormed_logits(
+        model, task_id=args.task_id, stranded=True)
+    
+    if args.freeze_model:
+        # constant weights let grappler fold & fuse ops in the graph
+        # that the explainers run repeatedly
+        logging.info("Freezing the model ...")
+        model_inputs, (counts_output, weightedsum_meannormed_logits) = \
+            freeze_graph(
+                model_inputs, [counts_output, weightedsum_meannormed_logits])
+    
     # shap explainer for the counts head
     profile_model_counts_explainer = shap.explainers.deep.TFDeepExplainer(
-        ([model.input[0], model.input[1]], 
-         tf.reduce_sum(model.outputs[1], axis=-1)),
+        ([model_inputs[0], model_inputs[1]], counts_output),
         data_func, 
         combine_mult_and_diffref=combine_mult_and_diffref)
 
     # explainer for the profile head
-    weightedsum_meannormed_logits = get_weightedsum_meannormed_logits(
-        model, task_id=args.task_id, stranded=True)
     profile_model_profile_explainer = shap.explainers.deep.TFDeepExplainer(
-        ([model.input[0], model.input[2]], weightedsum_meannormed_logits),
+        ([model_inputs[0], model_inputs[2]], weightedsum_meannormed_logits),
         data_func, 
         combine_mult_and_diffref=combine_mult_and_diffref)
 
-    logging.info("Generating 'counts' shap scores")
-    counts_shap_scores = profile_model_counts_explainer.shap_values(
-        [X, bias_counts_input], progress_message=100)
+    # the hyp shap scores, one hot sequences & chrom positions are
+    # saved to a HDF5 file for each of the two heads, the scores are
+    # written batch by batch
+    counts_scores_file = create_scores_file(
+        peaks_df, X, '{}/counts_scores.h5'.format(shap_dir))
+    profile_scores_file = create_scores_file(
+        peaks_df, X, '{}/profile_scores.h5'.format(shap_dir))
     
-    # save the dictionary in HDF5 formnat
-    logging.info("Saving 'counts' scores")
-    output_fname = '{}/counts_scores.h5'.format(shap_dir)
-    
-    # save the hyp shap scores, one hot sequences & chrom positions
-    # to a HDF5 file
-    save_scores(peaks_df, X, counts_shap_scores[0], output_fname)
-    
-    logging.info("Generating 'profile' shap scores")
-    profile_shap_scores = profile_model_profile_explainer.shap_values(
-        [X, bias_profile_input], progress_message=100)
-    
-    # save the dictionary in HDF5 formnat
-    logging.info("Saving 'profile' scores")
-    output_fname = '{}/profile_scores.h5'.format(shap_dir)
-
-    # save the profile hyp shap scores, one hot sequences & chrom 
-    # positions to a HDF5 file
-    save_scores(peaks_df, X, profile_shap_scores[0], output_fname)
+    logging.info("Generating & saving 'counts' & 'profile' shap scores")
+    try:
+        explain_in_batches(
+            [profile_model_counts_explainer, profile_model_profile_explainer],
+            X, [bias_counts_input, bias_profile_input], args.shap_batch_size,
+            references, 
+            [counts_scores_file['hyp_scores'], 
+             profile_scores_file['hyp_scores']])
+    finally:
+        counts_scores_file.close()
+        profile_scores_file.close()
     
     # save the dataframe as a new .bed file 
     peaks_df.to_csv('{}/peaks_valid_scores.bed'.format(shap_dir), 
@@ -309,9 +590,6 @@ def shap_scores(args, shap_dir):
         
         
 def shap_scores_main():
-    # disable eager execution so shap deep explainer wont break
-    tf.compat.v1.disable_eager_execution()
-    
     # parse the command line arguments
     parser = shap_scores_argsparser()
     args = parser.parse_args()
@@ -368,6 +646,20 @@ def shap_scores_main():
     # set up the loggers
     init_logger(logfname)
     
+    import tensorflow as tf
+    
+    from basepairmodels.cli.losses import MultichannelMultinomialNLL
+    from tensorflow.keras.utils import CustomObjectScope
+    
+    # disable eager execution so shap deep explainer wont break
+    tf.compat.v1.disable_eager_execution()
+    
+    if args.xla:
+        # XLA auto clustering for the sessions created from here on,
+        # fuses the convolutions & pointwise ops that the explainers
+        # run over and over
+        tf.config.optimizer.set_jit(True)
+    
     # shap
     logging.info("Loading {}".format(args.model))
     with CustomObjectScope({'MultichannelMultinomialNLL': 
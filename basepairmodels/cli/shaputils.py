@@ -6,6 +6,7 @@ import tensorflow as tf
 
 from deeplift.dinuc_shuffle import dinuc_shuffle
 
+
 def combine_mult_and_diffref(mult, orig_inp, bg_data):
     to_return = []
     
@@ -53,6 +54,72 @@ def shuffle_several_times(s):
             np.array([s[1] for i in range(numshuffles)])]
 
 
+def freeze_graph(inputs, outputs):
+    """
+        Freeze the variables of the current Keras session into
+        constants, and import the part of the graph that computes
+        `outputs` from `inputs` (graph mode only)
+
+        Args:
+            inputs (list): list of input tensors (placeholders)
+
+            outputs (list): list of output tensors
+
+        Returns:
+            tuple: (list of the frozen input tensors, list of the
+                frozen output tensors)
+    """
+
+    session = tf.compat.v1.keras.backend.get_session()
+
+    frozen_graph_def = tf.compat.v1.graph_util.convert_variables_to_constants(
+        session, session.graph.as_graph_def(), 
+        [tensor.op.name for tensor in outputs])
+
+    # import into the session's graph, so the same session can run the
+    # frozen tensors
+    with session.graph.as_default():
+        tensors = tf.compat.v1.import_graph_def(
+            frozen_graph_def, name='frozen',
+            return_elements=[tensor.name for tensor in inputs + outputs])
+
+    return tensors[:len(inputs)], tensors[len(inputs):]
+
+
+def mixed_precision_model(model):
+    """
+        Rebuild a Keras functional model with the 'mixed_float16'
+        policy. The weights are copied over, and the input & output
+        layers are kept in float32 so the model is fed & returns
+        float32 tensors
+
+        Args:
+            model (tensorflow.keras.Model): the model loaded from disk
+
+        Returns:
+            tensorflow.keras.Model
+    """
+
+    config = model.get_config()
+
+    # the layers whose outputs are the model outputs
+    output_layers = set(name for name, _, _ in config['output_layers'])
+
+    # a saved model has the dtype of every layer in its config, so
+    # setting the global policy before load_model has no effect
+    for layer in config['layers']:
+        if layer['class_name'] == 'InputLayer' or \
+                layer['name'] in output_layers:
+            layer['config']['dtype'] = 'float32'
+        else:
+            layer['config']['dtype'] = 'mixed_float16'
+
+    mixed_model = tf.keras.Model.from_config(config)
+    mixed_model.set_weights(model.get_weights())
+
+    return mixed_model
+
+
 def get_weightedsum_meannormed_logits(model, task_id, stranded):
     print(model.outputs[0].shape)
     
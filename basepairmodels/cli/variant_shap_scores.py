@@ -8,7 +8,7 @@ import shap
 import tensorflow as tf
 import tensorflow_probability as tfp
 
-from basepairmodels.cli.argparsers import shap_scores_argsparser
+from basepairmodels.cli.argparsers import variant_shap_scores_argsparser
 from basepairmodels.cli.bpnetutils import *
 from basepairmodels.cli.exceptionhandler import NoTracebackException
 from basepairmodels.cli.shaputils import *
@@ -178,6 +178,10 @@ def shap_scores(args, shap_dir):
     # list to hold all the sequences for the peaks
     sequences = []
     
+    # sigma & window width of the gaussian used to smooth the control
+    # profiles
+    sigma, window_width = args.control_smoothing[0]
+    
     # iterate through all the peaks
     for idx, row in peaks_df.iterrows():
         start = row['start']
@@ -216,9 +220,9 @@ def shap_scores(args, shap_dir):
 
             # read the values from the control bigWigs
             for i in range(len(control_bigWigs)):
-                vals = np.nan_to_num(
-                    control_bigWigs[i].values(row['chrom'], start, end))
-                bias_counts_input[idx, 0] += np.sum(vals)
+                vals = np.nan_to_num(control_bigWigs[i].values(
+                    row['chrom'], start, end, numpy=True), copy=False)
+                bias_counts_input[idx, 0] += np.sum(vals, dtype=np.float64)
                 bias_profile_input[idx, :, 0] += vals
             
             # we need to take the log of the sum of counts
@@ -227,8 +231,6 @@ def shap_scores(args, shap_dir):
             bias_counts_input[idx, 0] = np.log(bias_counts_input[idx, 0] + 1)
                          
             # compute the smoothed control profile
-            sigma = float(args.control_smoothing[0])
-            window_width = int(args.control_smoothing[1])
             bias_profile_input[idx, :, 1] = gaussian1D_smoothing(
                 bias_profile_input[idx, :, 0], sigma, window_width)
 
@@ -322,7 +324,7 @@ def shap_scores_main():
     tf.compat.v1.disable_eager_execution()
     
     # parse the command line arguments
-    parser = shap_scores_argsparser()
+    parser = variant_shap_scores_argsparser()
     args = parser.parse_args()
     
     # check if the output directory exists
@@ -0,0 +1,166 @@
+import os
+import pytest
+import sys
+
+from basepairmodels.cli import argparsers
+from basepairmodels.cli.argparsers import _args_class
+from basepairmodels.cli.argparsers import get_training_args
+from basepairmodels.cli.argparsers import parse_slotted_args
+from basepairmodels.cli.argparsers import parse_training_args
+from basepairmodels.cli.argparsers import parse_with_cache
+from basepairmodels.cli.argparsers import shap_scores_argsparser
+from basepairmodels.cli.argparsers import training_argsparser
+from basepairmodels.cli.argparsers import variant_shap_scores_argsparser
+
+
+# required arguments for the training & shap_scores scripts
+TRAINING_ARGV = ['-g', 'hg38.genome.fa', '-c', 'hg38.chrom.sizes',
+                 '--chroms', 'chr1', '-i', 'input_data.json']
+
+SHAP_SCORES_ARGV = ['-g', 'hg38.genome.fa', '--input-seq-len', '2114',
+                    '--control-len', '1000', '-m', 'model.h5',
+                    '-b', 'peaks.bed', '-o', 'shap']
+
+
+def test_memoized_parsers():
+
+    assert training_argsparser() is training_argsparser()
+
+    # the memoized shared parsers are not modified, so a parser can be
+    # built again
+    shap_scores_argsparser.cache_clear()
+    args = shap_scores_argsparser().parse_args(SHAP_SCORES_ARGV)
+    assert args.threads == 8
+
+    # var_shap doesn't have the shap_scores only options
+    args = variant_shap_scores_argsparser().parse_args(SHAP_SCORES_ARGV)
+    assert not hasattr(args, 'threads')
+    with pytest.raises(SystemExit):
+        variant_shap_scores_argsparser().parse_args(
+            SHAP_SCORES_ARGV + ['--shap-batch-size', '64'])
+
+    # the cached namespace can't be modified through the returned
+    # copy
+    args = get_training_args(TRAINING_ARGV)
+    args.batch_size = 1
+    args.chroms.append('chrX')
+    args = get_training_args(TRAINING_ARGV)
+    assert args.batch_size == 64
+    assert args.chroms == ['chr1']
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason="dataclasses require python 3.7")
+def test_slotted_args():
+    import dataclasses
+
+    args = parse_training_args(TRAINING_ARGV)
+    assert type(args).__name__ == 'TrainingArgs'
+    assert dataclasses.asdict(args) == \
+        vars(training_argsparser().parse_args(TRAINING_ARGV))
+
+    # slotted & frozen
+    assert not hasattr(args, '__dict__')
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        args.batch_size = 1
+
+    # the class is built once per parser factory
+    assert _args_class(training_argsparser) is type(args)
+    args = parse_slotted_args(shap_scores_argsparser, SHAP_SCORES_ARGV)
+    assert type(args).__name__ == 'ShapScoresArgs'
+    assert type(args) is _args_class(shap_scores_argsparser)
+
+
+def test_parse_with_cache(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    cache_dir = tmp_path / 'basepairmodels' / 'argcache'
+
+    # count the parses that are not served from the cache
+    num_parses = []
+
+    def training_factory():
+        num_parses.append(1)
+        return training_argsparser()
+
+    # miss
+    args = parse_with_cache(training_factory, TRAINING_ARGV)
+    assert len(num_parses) == 1
+    assert args.control_smoothing == ((7.5, 80),)
+    assert len(os.listdir(str(cache_dir))) == 1
+
+    # hit, tuples come back as lists
+    args = parse_with_cache(training_factory, TRAINING_ARGV)
+    assert len(num_parses) == 1
+    assert args.control_smoothing == [[7.5, 80]]
+    assert vars(args) == {**vars(training_argsparser().parse_args(
+        TRAINING_ARGV)), 'control_smoothing': [[7.5, 80]],
+        'exclude_chroms': []}
+
+    # different arguments
+    parse_with_cache(training_factory, TRAINING_ARGV + ['-b', '32'])
+    assert len(num_parses) == 2
+
+    # a different factory with the same arguments
+    def other_factory():
+        num_parses.append(1)
+        return training_argsparser()
+
+    parse_with_cache(other_factory, TRAINING_ARGV)
+    assert len(num_parses) == 3
+
+    # editing the module invalidates the cache
+    getmtime = os.path.getmtime
+    monkeypatch.setattr(os.path, 'getmtime', lambda path: getmtime(path) + 1)
+    parse_with_cache(training_factory, TRAINING_ARGV)
+    assert len(num_parses) == 4
+    monkeypatch.setattr(os.path, 'getmtime', getmtime)
+
+    # a corrupt cache file is parsed again & rewritten
+    for cache_file in cache_dir.iterdir():
+        cache_file.write_text('{')
+    args = parse_with_cache(training_factory, TRAINING_ARGV)
+    assert len(num_parses) == 5
+    assert args.batch_size == 64
+    parse_with_cache(training_factory, TRAINING_ARGV)
+    assert len(num_parses) == 5
+
+
+def test_parse_with_cache_unwritable(tmp_path, monkeypatch):
+
+    # the cache directory can't be created under a file
+    cache_home = tmp_path / 'cache'
+    cache_home.write_text('')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(cache_home))
+
+    args = parse_with_cache(training_argsparser, TRAINING_ARGV)
+    assert args.batch_size == 64
+    assert cache_home.read_text() == ''
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason="module __getattr__ requires python 3.7")
+def test_lazy_parser_attributes():
+
+    assert argparsers.training_parser is training_argsparser()
+    assert argparsers.shap_scores_parser is shap_scores_argsparser()
+
+    with pytest.raises(AttributeError):
+        argparsers.unknown_parser
+
+
+def test_control_smoothing():
+
+    # default
+    args = shap_scores_argsparser().parse_args(SHAP_SCORES_ARGV)
+    assert args.control_smoothing == ((7.0, 81),)
+
+    # command line values are converted to (sigma, window_width) pairs
+    args = training_argsparser().parse_args(
+        TRAINING_ARGV + ['--control-smoothing', '7.5', '80', '1', '11'])
+    assert args.control_smoothing == [(7.5, 80), (1.0, 11)]
+
+    # odd number of values
+    with pytest.raises(SystemExit):
+        shap_scores_argsparser().parse_args(
+            SHAP_SCORES_ARGV + ['--control-smoothing', '7.0'])
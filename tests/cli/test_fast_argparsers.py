@@ -0,0 +1,43 @@
+import pytest
+
+from basepairmodels.cli.argparsers import predict_argsparser
+from basepairmodels.cli.argparsers import training_argsparser
+from basepairmodels.cli.fast_argparsers import get_fast_parser
+
+
+def test_fast_parser_matches_argparse():
+
+    # a well formed command line for the predict script
+    argv = ['-g', 'hg38.genome.fa', '-s', 'hg38.chrom.sizes',
+            '--chroms', 'chr1', 'chr2', '--input-data', 'input_data.json',
+            '-m', 'model.h5', '--output-dir=predictions',
+            '--batch-size', '128', '--exponentiate-counts',
+            '--other-tags', 'a', 'b']
+
+    fast_parser = get_fast_parser(predict_argsparser)
+
+    # the command line should be handled by the fast path
+    assert fast_parser._parse(argv) is not None
+
+    assert vars(fast_parser.parse_args(argv)) == \
+        vars(predict_argsparser().parse_args(argv))
+
+
+def test_fast_parser_fallback():
+
+    fast_parser = get_fast_parser(training_argsparser)
+
+    # abbreviated option is handled by argparse
+    argv = ['-g', 'hg38.genome.fa', '-c', 'hg38.chrom.sizes',
+            '--chroms', 'chr1', '-i', 'input_data.json', '--batch', '32']
+
+    assert fast_parser._parse(argv) is None
+    assert fast_parser.parse_args(argv).batch_size == 32
+
+    # missing required arguments & invalid values exit with the
+    # argparse error
+    with pytest.raises(SystemExit):
+        fast_parser.parse_args(['-g', 'hg38.genome.fa'])
+
+    with pytest.raises(SystemExit):
+        fast_parser.parse_args(argv[:-1] + ['x'])
@@ -0,0 +1,32 @@
+import numpy as np
+
+from basepairmodels.cli.sequtils import dinuc_shuffle_batch
+from basepairmodels.cli.sequtils import seq_to_tokens
+
+
+def dinuc_counts(tokens):
+    return np.bincount(tokens[:-1] * 5 + tokens[1:], minlength=25)
+
+
+def test_dinuc_shuffle_batch():
+
+    rng = np.random.RandomState(20210304)
+    tokens = rng.randint(0, 5, size=(8, 100)).astype(np.uint8)
+
+    # the sequences are shuffled in 3 chunks
+    shuffled = dinuc_shuffle_batch(tokens, rng, chunk_size=3)
+    assert shuffled.shape == tokens.shape
+    assert shuffled.dtype == tokens.dtype
+    assert not np.array_equal(shuffled, tokens)
+
+    # each shuffled sequence has the same first base & the same
+    # dinucleotide counts as the original sequence
+    for original, shuffle in zip(tokens, shuffled):
+        assert original[0] == shuffle[0]
+        assert np.array_equal(dinuc_counts(original), dinuc_counts(shuffle))
+
+
+def test_seq_to_tokens():
+
+    assert np.array_equal(seq_to_tokens('ACGTacgtNn'), 
+                          [0, 1, 2, 3, 0, 1, 2, 3, 4, 4])
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+# shap_scores imports bpnetutils, which needs pytz
+pytest.importorskip("pytz")
+
+from basepairmodels.cli import shap_scores
+from basepairmodels.cli.shap_scores import create_scores_file
+from basepairmodels.cli.shap_scores import explain_in_batches
+from basepairmodels.cli.shap_scores import fetch_block_sequences
+from basepairmodels.cli.shap_scores import get_fetch_blocks
+from basepairmodels.cli.sequtils import seq_to_tokens
+
+
+class FastaFile:
+    """ in memory stand in for pysam.FastaFile """
+
+    def __init__(self, seqs):
+        self.seqs = seqs
+
+    def get_reference_length(self, chrom):
+        return len(self.seqs[chrom])
+
+    def fetch(self, chrom, start, end):
+        assert 0 <= start < end <= len(self.seqs[chrom])
+        return self.seqs[chrom][start:end]
+
+
+class Explainer:
+    """ stand in for shap's TFDeepExplainer that runs out of memory
+        for batches larger than `max_batch_size`
+    """
+
+    def __init__(self, max_batch_size, scale):
+        self.max_batch_size = max_batch_size
+        self.scale = scale
+        self.batch_sizes = []
+
+    def shap_values(self, model_inputs, progress_message=None):
+        import tensorflow as tf
+
+        X, bias = model_inputs
+        self.batch_sizes.append(len(X))
+        if len(X) > self.max_batch_size:
+            raise tf.errors.ResourceExhaustedError(None, None, "OOM")
+
+        return [X * self.scale + bias[:, None, None]]
+
+
+def block_indices(blocks):
+    return [(chrom, list(peak_idxs)) for chrom, peak_idxs in blocks]
+
+
+def test_get_fetch_blocks(monkeypatch):
+
+    monkeypatch.setattr(shap_scores, 'FETCH_BLOCK_MAX_GAP', 10)
+    monkeypatch.setattr(shap_scores, 'FETCH_BLOCK_MAX_SPAN', 100)
+
+    chroms = np.array(['chr2', 'chr1', 'chr1', 'chr1', 'chr2', 'chr1', 'chr1',
+                       'chr1'])
+    starts = np.array([0, 40, -5, 15, 5, 90, 65, 200])
+    ends = np.array([20, 60, 15, 35, 25, 110, 85, 220])
+
+    blocks = get_fetch_blocks(chroms, starts, ends)
+
+    # sorted by chrom & start, a block spanning more than 100 bases
+    # (-5 to 110) & a gap of more than 10 (110 to 200) start new
+    # blocks
+    assert block_indices(blocks) == [
+        ('chr1', [2, 3, 1, 6]), ('chr1', [5]), ('chr1', [7]),
+        ('chr2', [0, 4])]
+
+
+def test_get_fetch_blocks_empty():
+
+    assert get_fetch_blocks(
+        np.array([], dtype=object), np.array([], dtype=np.int64),
+        np.array([], dtype=np.int64)) == []
+
+
+def test_fetch_block_sequences():
+
+    fasta_ref = FastaFile({'chr1': 'ACGTNacgtA'})
+
+    # a peak that starts before 0, one inside the chromosome & one
+    # that ends past the end of the chromosome
+    starts = np.array([-2, 2, 6])
+    ends = np.array([3, 6, 12])
+
+    peak_tokens = fetch_block_sequences(fasta_ref, 'chr1', starts, ends)
+
+    assert [list(tokens) for tokens in peak_tokens] == [
+        list(seq_to_tokens('ACG')), list(seq_to_tokens('GTNa')),
+        list(seq_to_tokens('cgtA'))]
+
+
+def test_fetch_block_sequences_outside_chrom():
+
+    fasta_ref = FastaFile({'chr1': 'ACGT'})
+
+    peak_tokens = fetch_block_sequences(
+        fasta_ref, 'chr1', np.array([6]), np.array([10]))
+
+    assert len(peak_tokens) == 1
+    assert len(peak_tokens[0]) == 0
+
+
+@pytest.mark.parametrize('num_examples', [0, 3])
+def test_create_scores_file(tmp_path, num_examples):
+
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("h5py")
+
+    peaks_df = pd.DataFrame({'chrom': ['chr1'] * num_examples,
+                             'start': np.arange(num_examples) * 10,
+                             'end': np.arange(num_examples) * 10 + 6})
+    one_hot_sequences = np.ones((num_examples, 6, 4), dtype=np.uint8)
+
+    with create_scores_file(peaks_df, one_hot_sequences, 
+                            str(tmp_path / 'scores.h5')) as f:
+        assert f['hyp_scores'].shape == (num_examples, 6, 4)
+        assert np.array_equal(f['input_seqs'][:], one_hot_sequences)
+        assert np.array_equal(f['coords_start'][:], peaks_df['start'])
+
+
+def test_explain_in_batches():
+
+    pytest.importorskip("tensorflow")
+
+    rng = np.random.RandomState(20210304)
+    X = rng.randint(0, 2, size=(10, 6, 4)).astype(np.uint8)
+    bias = np.arange(10, dtype=np.float32)
+
+    explainers = [Explainer(10, 1.0), Explainer(3, 2.0)]
+    outputs = [np.zeros(X.shape, dtype=np.float32) for _ in explainers]
+    references = {'seq': None}
+
+    explain_in_batches(explainers, X, [bias, -bias], 8, references, outputs)
+
+    # the batch size is halved until the second explainer fits, the
+    # first explainer recomputes the failed batches
+    assert explainers[0].batch_sizes == [8, 4, 2, 2, 2, 2, 2]
+    assert explainers[1].batch_sizes == [8, 4, 2, 2, 2, 2, 2]
+    assert references == {}
+
+    assert np.array_equal(outputs[0], X + bias[:, None, None])
+    assert np.array_equal(outputs[1], X * 2.0 - bias[:, None, None])
+
+
+def test_explain_in_batches_out_of_memory():
+
+    tf = pytest.importorskip("tensorflow")
+
+    X = np.zeros((4, 6, 4), dtype=np.uint8)
+    outputs = [np.zeros(X.shape, dtype=np.float32)]
+
+    # out of memory with a batch size of 1
+    with pytest.raises(tf.errors.ResourceExhaustedError):
+        explain_in_batches([Explainer(0, 1.0)], X, [np.zeros(4)], 4, {}, 
+                           outputs)